@@ -5,6 +5,7 @@
 # Go-style RPC client using BSON as the codec.
 
 import bson
+import hashlib
 import hmac
 import struct
 try:
@@ -32,6 +33,10 @@ class BsonRpcClient(gorpc.GoRpcClient):
     self.addr = addr
     self.user = user
     self.password = password
+    if self.user:
+      # key the HMAC once - authenticate() clones this instead of
+      # re-running the key schedule on every (re)dial
+      self.auth_hmac = hmac.HMAC(self.password, digestmod=hashlib.md5)
     if encrypted:
       protocol = 'https'
     else:
@@ -54,7 +59,9 @@ class BsonRpcClient(gorpc.GoRpcClient):
   def authenticate(self):
     challenge = self.call('AuthenticatorCRAMMD5.GetNewChallenge', "").reply['Challenge']
     # CRAM-MD5 authentication.
-    proof = self.user + " " + hmac.HMAC(self.password, challenge).hexdigest()
+    h = self.auth_hmac.copy()
+    h.update(challenge)
+    proof = self.user + " " + h.hexdigest()
     self.call('AuthenticatorCRAMMD5.Authenticate', {"Proof": proof})
 
   def encode_request(self, req):
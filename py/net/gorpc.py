@@ -194,7 +194,10 @@ class GoRpcClient(object):
         return False
     return True
 
-  __del__ = close
+  # No __del__ here on purpose: a finalizer makes every client a
+  # candidate for gc resurrection tracking, which is real overhead for
+  # the short-lived clients created during connection failover. Owners
+  # call close() explicitly (and the OS reclaims the socket regardless).
 
   def next_sequence_id(self):
     self.seq += 1
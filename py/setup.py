@@ -4,7 +4,15 @@
 
 from distutils.core import setup
 
+# build the optional C accelerator for vtdb/times.py when Cython is present
+try:
+  from Cython.Build import cythonize
+  ext_modules = cythonize(['vtdb/_times_fast.pyx'])
+except ImportError:
+  ext_modules = []
+
 setup(name = "vtdb",
       packages=["vtdb", "net"],
       platforms = "Any",
+      ext_modules = ext_modules,
       )
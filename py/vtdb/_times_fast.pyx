@@ -0,0 +1,81 @@
+# Optional compiled parser for the MySQL wire datetime format:
+#   YYYY-MM-DD[ T]HH:MM:SS[.ffffff]
+#
+# Scans the raw buffer with C integer arithmetic and builds the result
+# through the CPython datetime C-API (datetime_new), which skips the
+# Python-level constructor argument parsing entirely. times.py imports
+# this when it has been built (see setup.py) and falls back to the
+# pure-python parser otherwise.
+
+from cpython.datetime cimport import_datetime, datetime_new
+
+import_datetime()
+
+
+cdef inline int _digit(char c) except -1:
+    if c < c'0' or c > c'9':
+        raise ValueError("invalid digit")
+    return c - c'0'
+
+
+cdef inline int _days_in_month(int year, int month):
+    if month == 2:
+        if (year % 4 == 0 and year % 100 != 0) or year % 400 == 0:
+            return 29
+        return 28
+    if month == 4 or month == 6 or month == 9 or month == 11:
+        return 30
+    return 31
+
+
+def parse_datetime(s):
+    """Parse 'YYYY-MM-DD[ T]HH:MM:SS[.ffffff]' into a datetime.
+
+    Raises ValueError on any other input.
+    """
+    cdef bytes buf
+    if isinstance(s, bytes):
+        buf = s
+    else:
+        # non-ascii input cannot be a MySQL datetime; the resulting
+        # UnicodeEncodeError is a ValueError, same as any other bad input
+        buf = s.encode('ascii')
+
+    cdef const char* p = buf
+    cdef Py_ssize_t n = len(buf)
+    cdef int year, month, day, hour, minute, second, usec, scale
+    cdef Py_ssize_t i
+
+    if n < 19 or p[4] != c'-' or p[7] != c'-' or \
+        (p[10] != c' ' and p[10] != c'T') or p[13] != c':' or p[16] != c':':
+        raise ValueError("invalid datetime %r" % s)
+
+    year = (_digit(p[0]) * 1000 + _digit(p[1]) * 100 +
+            _digit(p[2]) * 10 + _digit(p[3]))
+    month = _digit(p[5]) * 10 + _digit(p[6])
+    day = _digit(p[8]) * 10 + _digit(p[9])
+    hour = _digit(p[11]) * 10 + _digit(p[12])
+    minute = _digit(p[14]) * 10 + _digit(p[15])
+    second = _digit(p[17]) * 10 + _digit(p[18])
+
+    # datetime_new maps to PyDateTime_FromDateAndTime, which performs no
+    # argument checking before CPython 3.6.1, so validate the ranges here
+    # ourselves: MySQL's zero date '0000-00-00 00:00:00' (and the likes of
+    # month 13 or Feb 31) must come out as ValueError, not as a corrupt
+    # datetime object.
+    if year < 1 or month < 1 or month > 12 or day < 1 or \
+        day > _days_in_month(year, month) or hour > 23 or \
+        minute > 59 or second > 59:
+        raise ValueError("invalid datetime %r" % s)
+
+    usec = 0
+    if n > 19:
+        # fractional seconds: '.' plus 1-6 digits
+        if p[19] != c'.' or n == 20 or n > 26:
+            raise ValueError("invalid datetime %r" % s)
+        scale = 100000
+        for i in range(20, n):
+            usec += _digit(p[i]) * scale
+            scale //= 10
+
+    return datetime_new(year, month, day, hour, minute, second, usec, None)
@@ -3,11 +3,43 @@
 # This module provides some Date and Time interface for vtdb
 #
 # Use Python datetime module to handle date and time columns.
+#
+# Installing the optional ciso8601 package accelerates row decoding:
+# its C scanner parses the MySQL wire format (YYYY-MM-DD HH:MM:SS[.ffffff])
+# much faster than any pure-python path.
+
+import re
 
 from datetime import date, datetime, time, timedelta
-from math import modf
+from threading import local
 from time import localtime
 
+# The *OrNone parsers run once per cell of a decoded result set, and real
+# result sets repeat the same strings a lot (created_at, updated_at,
+# partition dates), so memoize them. The caches are bounded so a
+# unique-heavy column cannot grow memory without limit. Since the cached
+# date/datetime/time/timedelta objects are immutable, handing the same
+# instance to multiple rows is safe.
+_parse_cache_size = 4096
+try:
+  from functools import lru_cache as _lru_cache
+except ImportError:
+  # older pythons: a plain dict that gets wiped when it fills up
+  def _lru_cache(maxsize):
+    def decorator(parse):
+      cache = {}
+      def cached_parse(s):
+        try:
+          return cache[s]
+        except KeyError:
+          if len(cache) >= maxsize:
+            cache.clear()
+          result = cache[s] = parse(s)
+          return result
+      cached_parse.__name__ = parse.__name__
+      return cached_parse
+    return decorator
+
 # FIXME(msolomon) what are these aliasesf for?
 Date = date
 Time = time
@@ -17,54 +49,158 @@ Timestamp = datetime
 DateTimeDeltaType = timedelta
 DateTimeType = datetime
 
+# localtime() is comparatively expensive, and callers converting the same
+# tick to a date, a time and a datetime in a row would otherwise pay for
+# it three times, so remember the last conversion (per thread - struct_time
+# is immutable but the cache slots are not).
+_ticks_cache = local()
+
+def _localtime(ticks):
+  if getattr(_ticks_cache, 'ticks', None) == ticks:
+    return _ticks_cache.struct
+  struct = localtime(ticks)
+  _ticks_cache.ticks = ticks
+  _ticks_cache.struct = struct
+  return struct
+
 # Convert UNIX ticks into a date instance.
 def DateFromTicks(ticks):
-  return date(*localtime(ticks)[:3])
+  st = _localtime(ticks)
+  return date(st.tm_year, st.tm_mon, st.tm_mday)
 
 # Convert UNIX ticks into a time instance.
 def TimeFromTicks(ticks):
-  return time(*localtime(ticks)[3:6])
+  st = _localtime(ticks)
+  return time(st.tm_hour, st.tm_min, st.tm_sec)
 
 # Convert UNIX ticks into a datetime instance.
 def TimestampFromTicks(ticks):
-  return datetime(*localtime(ticks)[:6])
+  st = _localtime(ticks)
+  return datetime(st.tm_year, st.tm_mon, st.tm_mday,
+                  st.tm_hour, st.tm_min, st.tm_sec)
+
+# Convert UNIX ticks into all three of (date, time, datetime) with a
+# single localtime call.
+def TicksToAll(ticks):
+  st = _localtime(ticks)
+  return (date(st.tm_year, st.tm_mon, st.tm_mday),
+          time(st.tm_hour, st.tm_min, st.tm_sec),
+          datetime(st.tm_year, st.tm_mon, st.tm_mday,
+                   st.tm_hour, st.tm_min, st.tm_sec))
+
+# datetime.fromisoformat (and date.fromisoformat below) is implemented in C
+# and is much faster than splitting the string and calling int() per field.
+# It only exists on newer pythons, so keep the split-based parser as a
+# fallback.
+_datetime_fromisoformat = getattr(datetime, 'fromisoformat', None)
+_date_fromisoformat = getattr(date, 'fromisoformat', None)
+
+try:
+  # optional C accelerator, parses the MySQL datetime format natively
+  import ciso8601
+  _ciso8601_parse_datetime = ciso8601.parse_datetime
+except ImportError:
+  _ciso8601_parse_datetime = None
+
+try:
+  # compiled scanner built from _times_fast.pyx when Cython is available,
+  # see setup.py
+  from vtdb._times_fast import parse_datetime as _compiled_parse_datetime
+except ImportError:
+  _compiled_parse_datetime = None
+
+# Decide the dispatch path with precompiled regexes instead of raising:
+# NULL/empty/garbage cells are common in result sets, and a failed match
+# is far cheaper than building and catching an exception per cell.
+_DATETIME_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?$')
+_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})$')
+_TIME_RE = re.compile(r'(\d{1,2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?$')
+_TIMEDELTA_RE = re.compile(r'(-?)(\d{1,3}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?$')
 
+# Turn a fraction-digits group like '25' into microseconds (250000),
+# with pure integer arithmetic - no float() round-trip.
+def _microseconds(frac):
+  if not frac:
+    return 0
+  return int((frac + '000000')[:6])
+
+@_lru_cache(_parse_cache_size)
 def DateTimeOrNone(s):
-  if ' ' in s:
-    sep = ' '
-  elif 'T' in s:
-    sep = 'T'
-  else:
+  m = _DATETIME_RE.match(s)
+  if m is None:
     return DateOrNone(s)
 
   try:
-    d, t = s.split(sep, 1)
-    return datetime(*[ int(x) for x in d.split('-')+t.split(':') ])
-  except:
-    return DateOrNone(s)
+    if _compiled_parse_datetime is not None:
+      return _compiled_parse_datetime(s)
+    if _ciso8601_parse_datetime is not None:
+      return _ciso8601_parse_datetime(s)
+    if _datetime_fromisoformat is not None:
+      return _datetime_fromisoformat(s.replace(' ', 'T', 1))
+    return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)),
+                    int(m.group(4)), int(m.group(5)), int(m.group(6)),
+                    _microseconds(m.group(7)))
+  except ValueError:
+    # right shape, but a field is out of range (month 13, hour 25, ...)
+    return None
 
+@_lru_cache(_parse_cache_size)
 def TimeDeltaOrNone(s):
-  try:
-    h, m, s = s.split(':')
-    td = timedelta(hours=int(h), minutes=int(m), seconds=int(float(s)), microseconds=int(modf(float(s))[0]*1000000))
-    if h < 0:
-      return -td
-    else:
-      return td
-  except:
+  m = _TIMEDELTA_RE.match(s)
+  if m is None:
     return None
+  td = timedelta(hours=int(m.group(2)), minutes=int(m.group(3)),
+                 seconds=int(m.group(4)),
+                 microseconds=_microseconds(m.group(5)))
+  if m.group(1):
+    return -td
+  return td
 
+@_lru_cache(_parse_cache_size)
 def TimeOrNone(s):
+  m = _TIME_RE.match(s)
+  if m is None:
+    return None
   try:
-    h, m, s = s.split(':')
-    return time(hour=int(h), minute=int(m), second=int(float(s)), microsecond=int(modf(float(s))[0]*1000000))
-  except:
+    return time(int(m.group(1)), int(m.group(2)), int(m.group(3)),
+                _microseconds(m.group(4)))
+  except ValueError:
     return None
 
+@_lru_cache(_parse_cache_size)
 def DateOrNone(s):
-  try: return date(*[ int(x) for x in s.split('-',2)])
-  except: return None
+  m = _DATE_RE.match(s)
+  if m is None:
+    return None
+  try:
+    if _date_fromisoformat is not None:
+      return _date_fromisoformat(s)
+    return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+  except ValueError:
+    return None
+
+# Bulk-convert a whole column of datetime strings. Cheaper than mapping
+# DateTimeOrNone over the column one call at a time: the parser lookup is
+# hoisted out of the loop and duplicate strings (the common case for
+# timestamp columns) are parsed once, via a dict local to the call.
+# Elements follow the DateTimeOrNone contract, so unparseable values come
+# back as None.
+def DateTimeColumnOrNone(column):
+  parse = DateTimeOrNone
+  seen = {}
+  result = []
+  append = result.append
+  for s in column:
+    try:
+      value = seen[s]
+    except KeyError:
+      value = seen[s] = parse(s)
+    append(value)
+  return result
 
+# isoformat runs as C-level integer formatting and already emits the
+# fixed layouts MySQL expects, so don't be tempted to route these through
+# the (slower, locale-aware) strftime machinery.
 def DateToString(d):
   return d.isoformat()
 
@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import random
+import time
 
 from net import bsonrpc
 from net import gorpc
@@ -93,20 +94,30 @@ class ZkOccConnection(object):
     self.password = password
 
     self.simpleConn = None
+    # callers tend to poll the same small set of paths over and over, so
+    # remember resolutions; safe because local_cell never changes
+    self._resolve_cache = {}
 
   def _resolve_path(self, zk_path):
     # Maps a 'meta-path' to a cell specific path.
     # '/zk/local/blah' -> '/zk/vb/blah'
-    parts = zk_path.split('/')
+    try:
+      return self._resolve_cache[zk_path]
+    except KeyError:
+      pass
 
-    if len(parts) < 3:
-      return zk_path
+    parts = zk_path.split('/')
 
-    if parts[2] != 'local':
-      return zk_path
+    if len(parts) < 3 or parts[2] != 'local':
+      resolved = zk_path
+    else:
+      parts[2] = self.local_cell
+      resolved = '/'.join(parts)
 
-    parts[2] = self.local_cell
-    return '/'.join(parts)
+    if len(self._resolve_cache) > 1024:
+      self._resolve_cache.clear()
+    self._resolve_cache[zk_path] = resolved
+    return resolved
 
   def dial(self):
     if self.simpleConn:
@@ -154,19 +165,40 @@ class ZkOccConnection(object):
     if not self.simpleConn:
       self.dial()
 
+    # only the paths that haven't been served yet are retried, so a
+    # partial failure doesn't re-fetch the entire batch
+    resolved = [self._resolve_path(p) for p in paths]
+    pending = list(resolved)
+    nodes = {}
     attempt = 0
     while True:
+      redial = False
       try:
-        return self.simpleConn.getv([self._resolve_path(p) for p in paths])
+        reply = self.simpleConn.getv(pending)
+        for node in reply['Nodes']:
+          nodes[node['Path']] = node
+        pending = [p for p in pending if p not in nodes]
+        if not pending:
+          # reorder to match the paths we were asked for
+          reply['Nodes'] = [nodes[p] for p in resolved]
+          return reply
+        error = 'partial result, missing %s' % (pending,)
       except Exception as e:
-        attempt += 1
-        if attempt >= self.max_attempts:
-          logging.warning('zkocc: getv command failed %u times: %s', attempt, e)
-          raise ZkOccError('zkocc getv command failed %u times: %s' % (attempt, e))
+        # connection-level failure, worth moving to another server
+        redial = True
+        error = e
 
-        # try the next server if there is one
-        if self.addr_count > 1:
-          self.dial()
+      attempt += 1
+      if attempt >= self.max_attempts:
+        logging.warning('zkocc: getv command failed %u times: %s', attempt, error)
+        raise ZkOccError('zkocc getv command failed %u times: %s' % (attempt, error))
+
+      # back off a little, then retry just the unserved paths
+      time.sleep(min(0.01 * (2 ** attempt), 0.25))
+
+      # try the next server if there is one
+      if redial and self.addr_count > 1:
+        self.dial()
 
   # returns a ZkNode, see header
   def children(self, path):
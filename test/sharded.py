@@ -107,11 +107,9 @@ def run_test_sharding():
   shard_1_master.create_db('vt_test_keyspace')
   shard_1_replica.create_db('vt_test_keyspace')
 
-  # start the tablets
-  shard_0_master.start_vttablet()
-  shard_0_replica.start_vttablet()
-  shard_1_master.start_vttablet()
-  shard_1_replica.start_vttablet()
+  # start the tablets in parallel
+  tablet.Tablet.start_vttablets([shard_0_master, shard_0_replica,
+                                 shard_1_master, shard_1_replica])
 
   # apply the schema on the first shard through vtctl, so all tablets
   # are the same (replication is not enabled yet, so allow_replication=false
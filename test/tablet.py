@@ -1,5 +1,6 @@
 import json
 import os
+import shlex
 import shutil
 import sys
 import time
@@ -52,6 +53,9 @@ class Tablet(object):
     self.memcached = None
     self.memcache_path = None
 
+    # cached MySQL connections, keyed by dbname (see connect)
+    self._conn_cache = {}
+
     # filled in during init_tablet
     self.keyspace = None
     self.shard = None
@@ -64,30 +68,44 @@ class Tablet(object):
   def mysqlctl(self, cmd, quiet=False, extra_my_cnf=None):
     utils.prog_compile(['mysqlctl'])
 
-    logLevel = ''
+    if isinstance(cmd, basestring):
+      cmd = shlex.split(cmd)
+    args = [os.path.join(utils.vtroot, 'bin', 'mysqlctl')]
     if utils.options.verbose and not quiet:
-      logLevel = ' -log.level=INFO'
+      args.append('-log.level=INFO')
+    args.extend(['-tablet-uid', '%u' % self.tablet_uid])
+    args.extend(cmd)
 
     env = None
     if extra_my_cnf:
       env = os.environ.copy()
       env['EXTRA_MY_CNF'] = extra_my_cnf
 
-    return utils.run_bg(os.path.join(utils.vtroot, 'bin', 'mysqlctl') +
-                        logLevel + ' -tablet-uid %u ' % self.tablet_uid + cmd,
-                        env=env)
+    return utils.run_bg_argv(args, env=env)
+
+  def _mysql_port_args(self):
+    return ['-port', '%u' % self.port, '-mysql-port', '%u' % self.mysql_port]
 
   def init_mysql(self, extra_my_cnf=None):
-    return self.mysqlctl('-port %u -mysql-port %u init' % (self.port, self.mysql_port), quiet=True, extra_my_cnf=extra_my_cnf)
+    return self.mysqlctl(self._mysql_port_args() + ['init'], quiet=True, extra_my_cnf=extra_my_cnf)
 
   def start_mysql(self):
-    return self.mysqlctl('-port %u -mysql-port %u start' % (self.port, self.mysql_port), quiet=True)
+    return self.mysqlctl(self._mysql_port_args() + ['start'], quiet=True)
 
   def shutdown_mysql(self):
-    return self.mysqlctl('-port %u -mysql-port %u shutdown' % (self.port, self.mysql_port), quiet=True)
+    return self.mysqlctl(self._mysql_port_args() + ['shutdown'], quiet=True)
 
   def teardown_mysql(self):
-    return self.mysqlctl('teardown -force', quiet=True)
+    self.close_connections()
+    return self.mysqlctl(['teardown', '-force'], quiet=True)
+
+  def close_connections(self):
+    for conn in self._conn_cache.values():
+      try:
+        conn.close()
+      except MySQLdb.MySQLError:
+        pass
+    self._conn_cache = {}
 
   def remove_tree(self):
     path = '%s/vt_%010d' % (utils.vtdataroot, self.tablet_uid)
@@ -103,8 +121,30 @@ class Tablet(object):
                 db=dbname)
 
   def connect(self, dbname=''):
-    conn = MySQLdb.Connect(
-      **self.mysql_connection_parameters(dbname))
+    # Reuse one connection per dbname - reconnecting for every query pays
+    # the socket + auth handshake each time, and populate() issues one
+    # query per insert. Callers get a fresh cursor and should close that,
+    # not the connection; teardown_mysql drops the cached connections.
+    conn = self._conn_cache.get(dbname)
+    if conn is not None:
+      try:
+        conn.ping(True)
+        if dbname:
+          # re-pin the schema in case it was dropped and recreated
+          conn.select_db(dbname)
+      except MySQLdb.MySQLError:
+        conn = None
+    if conn is None:
+      conn = MySQLdb.Connect(
+        **self.mysql_connection_parameters(dbname))
+      # DB-API connections start with autocommit off, so on a cached
+      # connection the first SELECT would pin an InnoDB REPEATABLE READ
+      # snapshot and every later read would see stale data (the read
+      # path never commits). Autocommit gives each query a fresh
+      # snapshot, like the connection-per-query code this replaced;
+      # writes still get a real transaction via begin()/commit().
+      conn.autocommit(True)
+      self._conn_cache[dbname] = conn
     return conn, conn.cursor()
 
   # Query the MySQL instance directly
@@ -125,7 +165,7 @@ class Tablet(object):
     try:
       return cursor.fetchall()
     finally:
-      conn.close()
+      cursor.close()
 
   # path is either:
   # - keyspace/shard for vttablet and vttablet-streaming
@@ -186,7 +226,7 @@ class Tablet(object):
       cursor.execute("show variables like '%s'" % name)
       return cursor.fetchone()
     finally:
-      conn.close()
+      cursor.close()
 
   def scrap(self, force=False, skip_rebuild=False):
     args = ['ScrapTablet']
@@ -232,6 +272,13 @@ class Tablet(object):
         expected_state = "NOT_SERVING"
       self.start_vttablet(wait_for_state=expected_state, auth=auth, memcache=True)
 
+  # Start vttablet on a group of tablets in parallel. Each start blocks
+  # polling for its own serving state, so the threads overlap all that
+  # waiting. Keyword arguments are shared by every tablet.
+  @classmethod
+  def start_vttablets(cls, tablets, **kwargs):
+    utils.run_parallel(lambda t: t.start_vttablet(**kwargs), tablets)
+
   @property
   def tablet_dir(self):
     return "%s/vt_%010d" % (utils.vtdataroot, self.tablet_uid)
@@ -283,7 +330,7 @@ class Tablet(object):
         args.extend(['-ca-cert', ca_cert])
 
     stderr_fd = open(os.path.join(self.tablet_dir, "vttablet.stderr"), "w")
-    self.proc = utils.run_bg(args, stderr=stderr_fd)
+    self.proc = utils.run_bg_argv(args, stderr=stderr_fd)
     stderr_fd.close()
 
     # wait for zookeeper PID just to be sure we have it
@@ -339,7 +386,7 @@ class Tablet(object):
   def start_memcache(self):
       self.memcache_path = os.path.join(self.tablet_dir, "memcache.sock")
       try:
-        self.memcached = utils.run_bg(' '.join(["memcached", "-s", self.memcache_path]), stdout=utils.devnull)
+        self.memcached = utils.run_bg_argv(["memcached", "-s", self.memcache_path], stdout=utils.devnull)
       except Exception as e:
         print "Error: memcached couldn't start"
         raise
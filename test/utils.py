@@ -9,6 +9,7 @@ import signal
 import socket
 from subprocess import Popen, CalledProcessError, PIPE
 import sys
+import threading
 import time
 import urllib
 
@@ -79,49 +80,67 @@ def reserve_ports(count):
 
 # sub-process management
 pid_map = {}
-already_killed = []
+already_killed = set()
+_proc_lock = threading.Lock()
 def _add_proc(proc):
-  pid_map[proc.pid] = proc
-  with open(tmp_root+'/test-pids', 'a') as f:
-    print >> f, proc.pid, os.path.basename(proc.args[0])
+  with _proc_lock:
+    pid_map[proc.pid] = proc
+    with open(tmp_root+'/test-pids', 'a') as f:
+      # the third column is the process group (see run_bg_argv: each bg
+      # process leads its own session, so pgid == pid)
+      print >> f, proc.pid, os.path.basename(proc.args[0]), proc.pid
 
 def kill_sub_processes():
   for proc in pid_map.values():
     if proc.pid and proc.returncode is None:
-      proc.kill()
+      try:
+        # one signal takes down the process and anything it spawned
+        os.killpg(proc.pid, signal.SIGTERM)
+      except OSError:
+        proc.kill()
+      try:
+        os.waitpid(proc.pid, os.WNOHANG)
+      except OSError:
+        pass
   if not os.path.exists(tmp_root+'/test-pids'):
     return
   with open(tmp_root+'/test-pids') as f:
-    for line in f:
-      try:
-        parts = line.strip().split()
-        pid = int(parts[0])
-        proc = pid_map.get(pid)
-        if not proc or (proc and proc.pid and proc.returncode is None):
-          if pid not in already_killed:
+    lines = f.read().splitlines()
+  for line in lines:
+    try:
+      parts = line.split(' ')
+      pid = int(parts[0])
+      proc = pid_map.get(pid)
+      if not proc or (proc and proc.pid and proc.returncode is None):
+        if pid not in already_killed:
+          if len(parts) > 2:
+            os.killpg(int(parts[2]), signal.SIGTERM)
+          else:
+            # legacy entry with no process group recorded
             os.kill(pid, signal.SIGTERM)
-      except OSError as e:
-        if options.verbose:
-          print >> sys.stderr, e
+    except OSError as e:
+      if options.verbose:
+        print >> sys.stderr, e
 
 def kill_sub_process(proc):
   pid = proc.pid
   proc.kill()
   if pid and pid in pid_map:
     del pid_map[pid]
-    already_killed.append(pid)
+    already_killed.add(pid)
 
-# run in foreground, possibly capturing output
-def run(cmd, trap_output=False, raise_on_error=True, **kargs):
+def _cmd_args(cmd):
   if isinstance(cmd, str):
-    args = shlex.split(cmd)
-  else:
-    args = cmd
+    return shlex.split(cmd)
+  return cmd
+
+# run in foreground with an argv list, possibly capturing output
+def run_argv(args, trap_output=False, raise_on_error=True, **kargs):
   if trap_output:
     kargs['stdout'] = PIPE
     kargs['stderr'] = PIPE
   if options.verbose:
-    print "run:", cmd, ', '.join('%s=%s' % x for x in kargs.iteritems())
+    print "run:", args, ', '.join('%s=%s' % x for x in kargs.iteritems())
   proc = Popen(args, **kargs)
   proc.args = args
   stdout, stderr = proc.communicate()
@@ -133,6 +152,13 @@ def run(cmd, trap_output=False, raise_on_error=True, **kargs):
         print 'cmd fail:', args, stdout, stderr
   return stdout, stderr
 
+# run in foreground, possibly capturing output. cmd can be a string (it
+# will go through shlex) - callers that already have an argv list should
+# use run_argv and skip the tokenizer.
+def run(cmd, trap_output=False, raise_on_error=True, **kargs):
+  return run_argv(_cmd_args(cmd), trap_output=trap_output,
+                  raise_on_error=raise_on_error, **kargs)
+
 # run sub-process, expects failure
 def run_fail(cmd, **kargs):
   if isinstance(cmd, str):
@@ -151,24 +177,27 @@ def run_fail(cmd, **kargs):
     raise TestError('expected fail:', args, stdout, stderr)
   return stdout, stderr
 
-# run a daemon - kill when this script exits
-def run_bg(cmd, **kargs):
+# run a daemon from an argv list - kill when this script exits.
+# Each daemon gets its own session so kill_sub_processes can take down
+# the whole process group with a single killpg.
+def run_bg_argv(args, **kargs):
+  kargs.setdefault('preexec_fn', os.setsid)
   if options.verbose:
-    print "run:", cmd, ', '.join('%s=%s' % x for x in kargs.iteritems())
-  if isinstance(cmd, str):
-    args = shlex.split(cmd)
-  else:
-    args = cmd
+    print "run:", args, ', '.join('%s=%s' % x for x in kargs.iteritems())
   proc = Popen(args=args, **kargs)
   proc.args = args
   _add_proc(proc)
   return proc
 
+# run a daemon - kill when this script exits
+def run_bg(cmd, **kargs):
+  return run_bg_argv(_cmd_args(cmd), **kargs)
+
 def wait_procs(proc_list, raise_on_error=True):
   for proc in proc_list:
     pid = proc.pid
     if pid:
-      already_killed.append(pid)
+      already_killed.add(pid)
   for proc in proc_list:
     proc.wait()
   for proc in proc_list:
@@ -186,15 +215,123 @@ def run_procs(cmds, raise_on_error=True):
 
 # compile command line programs
 compiled_progs = []
-def prog_compile(names):
-  for name in names:
-    if name in compiled_progs:
-      continue
-    compiled_progs.append(name)
+_compile_lock = threading.Lock()
+# one event per claimed name, set once its build has finished; a caller
+# that finds a name already claimed by another thread waits on the event
+# instead of racing ahead of the in-flight go build
+_compile_events = {}
+
+# manifest of the newest source mtime each binary was built against, so
+# later test processes can skip go build too (compiled_progs only lives
+# for one process)
+compile_manifest = tmp_root+'/compile-cache.json'
+_manifest_lock = threading.Lock()
+
+# The cmd directories are thin mains - virtually all logic lives in the
+# shared libraries (go/vt, go/zk, go/bson, ...) - so the scan has to
+# cover the whole go tree or a library edit would silently reuse a stale
+# binary. One walk per process: the sources don't change mid-run, and
+# every binary shares the same answer.
+_newest_source_mtime_cache = []
+def _newest_source_mtime():
+  if not _newest_source_mtime_cache:
+    newest = 0
+    for dirpath, dirnames, filenames in os.walk(vttop+'/go'):
+      for filename in filenames:
+        if filename.endswith('.go'):
+          mtime = os.path.getmtime(os.path.join(dirpath, filename))
+          if mtime > newest:
+            newest = mtime
+    _newest_source_mtime_cache.append(newest)
+  return _newest_source_mtime_cache[0]
+
+# True if the installed binary is newer than every .go source under the
+# program's cmd directory and the manifest agrees nothing changed since
+# the last build. Any stat/manifest trouble means "rebuild".
+def _is_binary_current(name):
+  try:
+    source_mtime = _newest_source_mtime()
+    if not source_mtime:
+      return False
+    if os.path.getmtime(vtroot+'/bin/'+name) <= source_mtime:
+      return False
+    with open(compile_manifest) as f:
+      manifest = json.load(f)
+    return manifest.get(name) == source_mtime
+  except (IOError, OSError, ValueError):
+    return False
+
+def _record_compile(name):
+  # builds can run in parallel (see prog_compile), so serialize the
+  # read-modify-write of the manifest
+  with _manifest_lock:
+    _record_compile_locked(name)
+
+def _record_compile_locked(name):
+  manifest = {}
+  try:
+    with open(compile_manifest) as f:
+      manifest = json.load(f)
+  except (IOError, ValueError):
+    pass
+  manifest[name] = _newest_source_mtime()
+  try:
+    with open(compile_manifest, 'w') as f:
+      json.dump(manifest, f)
+  except IOError:
+    pass
+
+# run fn over each item in its own thread, propagating the first failure.
+# The items are independent subprocess invocations spending their time in
+# the kernel, so plain threads parallelize them fine.
+def run_parallel(fn, items):
+  if len(items) == 1:
+    return fn(items[0])
+  errors = []
+  def _run_one(item):
+    try:
+      fn(item)
+    except Exception as e:
+      errors.append(e)
+  threads = [threading.Thread(target=_run_one, args=(item,)) for item in items]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  if errors:
+    raise errors[0]
+
+def _build_one(name):
+  try:
     if options.no_build:
       debug('Skipping build of '+name)
+    elif _is_binary_current(name):
+      debug('Skipping build of '+name+' (up to date)')
     else:
       run('go build', cwd=vttop+'/go/cmd/'+name)
+      _record_compile(name)
+  finally:
+    # set even on a failed build so waiters don't hang; the builder
+    # raises and they will fail fast on the missing binary
+    _compile_events[name].set()
+
+def prog_compile(names):
+  with _compile_lock:
+    todo = []
+    pending = []
+    for name in names:
+      if name in _compile_events:
+        pending.append(_compile_events[name])
+      else:
+        _compile_events[name] = threading.Event()
+        compiled_progs.append(name)
+        todo.append(name)
+  if todo:
+    run_parallel(_build_one, todo)
+  # builds claimed by other callers may still be in flight - don't return
+  # until those binaries are done too
+  for event in pending:
+    event.wait()
 
 # background zk process
 # (note the zkocc addresses will only work with an extra zkocc process)
@@ -275,7 +412,7 @@ def zkocc_start(cells=['test_nj'], extra_params=[]):
           '-logfile', logfile,
           '-log.level', 'INFO',
           ] + extra_params + cells
-  sp = run_bg(args)
+  sp = run_bg_argv(args)
 
   # wait for vars
   timeout = 5.0
@@ -310,10 +447,8 @@ def run_vtctl(clargs, log_level='WARNING', auto_log=False, **kwargs):
           '-log.level='+log_level,
           '-logfile=/dev/null']
   if isinstance(clargs, str):
-    cmd = " ".join(args) + ' ' + clargs
-  else:
-    cmd = args + clargs
-  return run(cmd, **kwargs)
+    clargs = shlex.split(clargs)
+  return run_argv(args + clargs, **kwargs)
 
 # vtclient2 helpers
 # driver is one of:
@@ -343,7 +478,7 @@ def vtclient2(uid, path, query, bindvars=None, user=None, password=None, driver=
     cmdline.append('-verbose')
   cmdline.append(query)
 
-  return run(cmdline, raise_on_error=raise_on_error, trap_output=True)
+  return run_argv(cmdline, raise_on_error=raise_on_error, trap_output=True)
 
 # mysql helpers
 def mysql_query(uid, dbname, query):